@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import sys, os, json, re
+import sys, os, re, csv, importlib.util
 from pathlib import Path
+import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
-from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
+try:
+    import numba
+except ImportError:  # opțional: doar accelerează totalul pe tabele mari
+    numba = None
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, Signal
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QFileDialog, QMessageBox, QWidget, QTabWidget,
@@ -25,37 +34,126 @@ COLUMNS = [
     "Processing date", "Processing Method"
 ]
 
-IBAN_REGEX = re.compile(r"^RO[A-Z0-9]{2,}$", re.IGNORECASE)
+# se aplică cu fullmatch pe textul deja trecut la majuscule
+IBAN_REGEX = re.compile(r"RO[A-Z0-9]{2,}")
+IBAN_COLS = ("Payer Account IBAN", "Payee Account IBAN")
+
+# calamine (Rust) citește xlsx mult mai repede decât openpyxl; dacă lipsește, engine implicit
+EXCEL_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else None
+
+# spații/NBSP și punctul de mii dispar, virgula devine punct zecimal
+_AMOUNT_TBL = str.maketrans({" ": None, "\u00A0": None, ".": None, ",": "."})
 
 def money_to_csv(s: str) -> str:
     s = str(s).strip()
-    if not s:
-        return ""
-    s = s.replace(" ", "").replace("\u00A0", "")
-    s = s.replace(".", "#").replace(",", ".").replace("#", "")
-    return s
+    return s.translate(_AMOUNT_TBL) if s else ""
+
+def text_to_csv(s) -> str:
+    return str(s).replace("\r", " ").replace("\n", " ").strip()
+
+def money_series_to_csv(s: pd.Series) -> pd.Series:
+    # varianta vectorizată a money_to_csv pentru o coloană întreagă
+    s = s.fillna("").astype(str).str.strip()
+    s = s.str.replace("[ \u00A0]", "", regex=True)
+    return s.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+
+NUMBA_MIN_ROWS = 5000
+EXPORT_CHUNK_ROWS = 100_000
+
+if numba is not None:
+    @numba.njit(cache=True, parallel=True)
+    def parse_amounts(buf):
+        # buf: matrice uint8 (rânduri x octeți UTF-8). Acceptă doar forma uzuală: '-' opțional,
+        # cifre, spații/NBSP și punct de mii ignorate, virgulă zecimală. Orice altceva ("+7", "1e3",
+        # prea multe cifre pentru un float exact) rămâne cu parsed=False pentru pd.to_numeric.
+        out = np.zeros(buf.shape[0])
+        parsed = np.ones(buf.shape[0], dtype=np.bool_)
+        for i in numba.prange(buf.shape[0]):
+            mant = 0.0
+            ndigits = 0
+            decimals = -1
+            neg = False
+            ok = True
+            for j in range(buf.shape[1]):
+                c = buf[i, j]
+                if c == 0:
+                    break
+                if c == 32 or c == 0xC2 or c == 0xA0 or c == 46:
+                    continue
+                if c == 44 and decimals < 0:
+                    decimals = 0
+                elif c == 45 and ndigits == 0 and decimals < 0 and not neg:
+                    neg = True
+                elif 48 <= c <= 57:
+                    ndigits += 1
+                    mant = mant * 10 + (c - 48)
+                    if decimals >= 0:
+                        decimals += 1
+                else:
+                    ok = False
+                    break
+            if not ok or ndigits > 15 or (neg and ndigits == 0):
+                parsed[i] = False
+            elif ndigits:
+                v = mant / 10.0 ** max(decimals, 0)
+                out[i] = -v if neg else v
+        return out, parsed
+
+    def amount_bytes(s: pd.Series) -> np.ndarray:
+        # lățimea rândului = cea mai lungă valoare, fără trunchiere
+        b = s.fillna("").astype(str).str.encode("utf-8").to_numpy().astype(bytes)
+        return b.view(np.uint8).reshape(len(b), b.itemsize)
 
 class PandasModel(QAbstractTableModel):
     dataChangedSignal = Signal()
     def __init__(self, df: pd.DataFrame):
         super().__init__()
-        self._df = df
+        # _full poate avea după primele _rows rânduri o rezervă de rânduri goale (capacitate),
+        # ca adăugarea la final să nu copieze tot tabelul la fiecare rând
+        self._full = df
+        self._rows = len(df)
+        self._rebuild_cache()
+
+    @property
+    def _df(self):
+        # doar rândurile reale, fără rezervă
+        return self._full if self._rows == len(self._full) else self._full.iloc[:self._rows]
+
+    def _rebuild_cache(self):
+        # matrice numpy cu valorile gata de afișat (NaN -> "", totul str), citită direct în data()
+        self._cache = self._full.astype(object).where(self._full.notna(), "").astype(str).to_numpy(copy=True)
+        # bitmap IBAN invalid per coloană, recalculat doar la editare
+        self._iban_bad = {}
+        for col in IBAN_COLS:
+            if col in self._full.columns:
+                text = self._full[col].fillna("").astype(str).str.strip()
+                ok = text.str.upper().str.fullmatch(IBAN_REGEX, na=False)
+                self._iban_bad[col] = (text.ne("") & ~ok).to_numpy(dtype=bool, copy=True)
+
+    def set_dataframe(self, df: pd.DataFrame):
+        self.beginResetModel()
+        self._full = df
+        self._rows = len(df)
+        self._rebuild_cache()
+        self.endResetModel()
 
     def rowCount(self, parent=QModelIndex()):
-        return 0 if parent.isValid() else len(self._df)
+        return 0 if parent.isValid() else self._rows
 
     def columnCount(self, parent=QModelIndex()):
-        return 0 if parent.isValid() else len(self._df.columns)
+        return 0 if parent.isValid() else len(self._full.columns)
 
     def data(self, index, role=Qt.DisplayRole):
+        # Qt cere și roluri nefolosite (ToolTip, Decoration, SizeHint...) la fiecare repaint
+        if role != Qt.DisplayRole and role != Qt.EditRole and role != Qt.ForegroundRole:
+            return None
         if not index.isValid():
             return None
-        val = self._df.iat[index.row(), index.column()]
         if role in (Qt.DisplayRole, Qt.EditRole):
-            return "" if pd.isna(val) else str(val)
-        if role == Qt.ForegroundRole and self._df.columns[index.column()] in ("Payer Account IBAN", "Payee Account IBAN"):
-            text = "" if pd.isna(val) else str(val).strip()
-            if text and not IBAN_REGEX.match(text):
+            return self._cache[index.row(), index.column()]
+        if role == Qt.ForegroundRole:
+            bad = self._iban_bad.get(self._full.columns[index.column()])
+            if bad is not None and bad[index.row()]:
                 from PySide6.QtGui import QBrush, QColor
                 return QBrush(QColor("#b00020"))
         return None
@@ -63,14 +161,19 @@ class PandasModel(QAbstractTableModel):
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if role != Qt.DisplayRole:
             return None
-        return str(self._df.columns[section]) if orientation == Qt.Horizontal else str(section + 1)
+        return str(self._full.columns[section]) if orientation == Qt.Horizontal else str(section + 1)
 
     def flags(self, index):
         return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable if index.isValid() else Qt.ItemIsEnabled
 
     def setData(self, index, value, role=Qt.EditRole):
         if role == Qt.EditRole and index.isValid():
-            self._df.iat[index.row(), index.column()] = value
+            self._full.iat[index.row(), index.column()] = value
+            self._cache[index.row(), index.column()] = "" if value is None else str(value)
+            col = self._full.columns[index.column()]
+            if col in self._iban_bad:
+                text = "" if value is None else str(value).strip()
+                self._iban_bad[col][index.row()] = bool(text) and not IBAN_REGEX.fullmatch(text.upper())
             self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
             self.dataChangedSignal.emit()
             return True
@@ -78,19 +181,48 @@ class PandasModel(QAbstractTableModel):
 
     def insertRows(self, position, rows=1, parent=QModelIndex()):
         self.beginInsertRows(QModelIndex(), position, position + rows - 1)
-        empty = pd.DataFrame([[""] * self.columnCount() for _ in range(rows)], columns=self._df.columns)
-        top = self._df.iloc[:position]
-        bottom = self._df.iloc[position:]
-        self._df = pd.concat([top, empty, bottom], ignore_index=True)
+        if position == self._rows:
+            # adăugare la final (cazul uzual): rândurile din rezervă sunt deja goale
+            self._reserve(self._rows + rows)
+        else:
+            empty = pd.DataFrame([[""] * self.columnCount() for _ in range(rows)], columns=self._full.columns)
+            top = self._full.iloc[:position]
+            bottom = self._full.iloc[position:]
+            self._full = pd.concat([top, empty, bottom], ignore_index=True)
+            blank = np.full((rows, self.columnCount()), "", dtype=object)
+            self._cache = np.concatenate([self._cache[:position], blank, self._cache[position:]])
+            for col, bad in self._iban_bad.items():
+                self._iban_bad[col] = np.insert(bad, position, np.zeros(rows, dtype=bool))
+        self._rows += rows
         self.endInsertRows()
         self.dataChangedSignal.emit()
         return True
 
+    def _reserve(self, need):
+        # capacitatea crește prin dublare -> cost amortizat O(1) pe rând adăugat
+        cap = len(self._full)
+        if need <= cap:
+            return
+        new_cap = max(need, 2 * cap, 16)
+        self._full = self._full.reindex(range(new_cap), fill_value="")
+        cache = np.full((new_cap, self.columnCount()), "", dtype=object)
+        cache[:cap] = self._cache
+        self._cache = cache
+        for col, bad in self._iban_bad.items():
+            grown = np.zeros(new_cap, dtype=bool)
+            grown[:cap] = bad
+            self._iban_bad[col] = grown
+
     def removeRows(self, position, rows=1, parent=QModelIndex()):
         if position < 0 or position >= self.rowCount():
             return False
-        self.beginRemoveRows(QModelIndex(), position, min(position + rows - 1, self.rowCount() - 1))
-        self._df = self._df.drop(self._df.index[position:position + rows]).reset_index(drop=True)
+        end = min(position + rows, self._rows)
+        self.beginRemoveRows(QModelIndex(), position, end - 1)
+        self._full = self._full.drop(self._full.index[position:end]).reset_index(drop=True)
+        self._cache = np.delete(self._cache, np.s_[position:end], axis=0)
+        for col, bad in self._iban_bad.items():
+            self._iban_bad[col] = np.delete(bad, np.s_[position:end])
+        self._rows -= end - position
         self.endRemoveRows()
         self.dataChangedSignal.emit()
         return True
@@ -98,21 +230,44 @@ class PandasModel(QAbstractTableModel):
 class CompanyTab(QWidget):
     titleChanged = Signal(QWidget, str)
 
-    def __init__(self, name="Firma"):
+    def __init__(self, name="Firma", df=None):
         super().__init__()
         self.company_name = name
-        self.df = pd.DataFrame(columns=COLUMNS)
+        # totalul se recalculează o singură dată după o rafală de modificări
+        self._total_timer = QTimer(self)
+        self._total_timer.setSingleShot(True)
+        self._total_timer.setInterval(50)
+        self._total_timer.timeout.connect(self.update_total)
+        # redenumirea tab-ului se face după ce utilizatorul se oprește din tastat
+        self._rename_timer = QTimer(self)
+        self._rename_timer.setSingleShot(True)
+        self._rename_timer.setInterval(150)
+        self._rename_timer.timeout.connect(self._emit_title_change_now)
+        # următorul PO_No. pentru rânduri adăugate la final
+        self._next_po = 1
+        self._auto_po = False
+        self.init_ui(df)
+
+    @classmethod
+    def from_rows(cls, name, rows, opts, path):
+        # construiește tab-ul direct cu datele finale (fără model gol intermediar)
+        tab = cls(name, pd.DataFrame(rows, columns=COLUMNS, dtype=object))
+        tab.path_edit.setText(path)
+        tab.no_header_chk.setChecked(opts.get("no_header", True))
+        tab.crlf_chk.setChecked(opts.get("crlf", True))
+        tab.bom_chk.setChecked(opts.get("bom", True))
+        return tab
+
+    def init_ui(self, df=None):
+        self.df = df if df is not None else pd.DataFrame(columns=COLUMNS)
         self.model = PandasModel(self.df)
-        self.init_ui()
-
-    def init_ui(self):
         layout = QVBoxLayout(self)
 
         # Nume companie (redenumire tab via semnal)
         title_bar = QHBoxLayout()
         self.name_edit = QLineEdit(self.company_name)
         self.name_edit.setPlaceholderText("Nume Firma")
-        self.name_edit.textChanged.connect(self._emit_title_change)
+        self.name_edit.textChanged.connect(lambda _: self._rename_timer.start())
         title_bar.addWidget(QLabel("Firma:"))
         title_bar.addWidget(self.name_edit, 1)
         layout.addLayout(title_bar)
@@ -161,10 +316,25 @@ class CompanyTab(QWidget):
         info.addWidget(self.total_label); info.addStretch(1)
         layout.addLayout(info)
 
-        self.model.dataChangedSignal.connect(self.update_total)
+        self.model.dataChangedSignal.connect(self._total_timer.start)
+        self.model.dataChanged.connect(self._on_data_changed)
+        self._sync_next_po()
         self.update_total()
 
-    def _emit_title_change(self):
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        # PO_No. editat manual -> recalculăm contorul
+        if self._auto_po:
+            return
+        col = COLUMNS.index("PO_No.")
+        if top_left.column() <= col <= bottom_right.column():
+            self._sync_next_po()
+
+    def _sync_next_po(self):
+        po = pd.to_numeric(self.model._df["PO_No."], errors="coerce")
+        finite = po[np.isfinite(po)]  # "inf"/"1e400" nu pot deveni int
+        self._next_po = int(finite.max()) + 1 if len(finite) else len(po) + 1
+
+    def _emit_title_change_now(self):
         self.company_name = self.name_edit.text().strip()
         self.titleChanged.emit(self, self.company_name or "Firma")
 
@@ -182,19 +352,26 @@ class CompanyTab(QWidget):
         m.exec(self.table.viewport().mapToGlobal(pos))
 
     def add_row(self, position=None):
+        append = position is None or position == self.model.rowCount()
         if position is None:
             position = self.model.rowCount()
         self.model.insertRows(position, 1)
         # PO_No. auto-increment
         try:
-            if position > 0:
+            if append:
+                n = self._next_po
+            elif position > 0:
                 prev = self.model._df.at[position - 1, "PO_No."]
                 n = int(str(prev)) if str(prev).isdigit() else position + 1
             else:
                 n = 1
-            self.model._df.at[position, "PO_No."] = n
+            self._auto_po = True
+            if self.model.setData(self.model.index(position, COLUMNS.index("PO_No.")), n) and append:
+                self._next_po = n + 1
         except Exception:
             pass
+        finally:
+            self._auto_po = False
 
     def delete_selected(self):
         idx = self.table.currentIndex()
@@ -207,17 +384,23 @@ class CompanyTab(QWidget):
             return
         try:
             if path.lower().endswith(".csv"):
-                df = pd.read_csv(path, dtype=object, keep_default_na=False)
+                try:
+                    # parser C++ multi-thread; coloanele lipsă vin ca null și se umplu mai jos
+                    opts = pacsv.ConvertOptions(column_types={c: pa.string() for c in COLUMNS},
+                                                strings_can_be_null=False, include_columns=COLUMNS,
+                                                include_missing_columns=True)
+                    df = pacsv.read_csv(path, convert_options=opts).to_pandas().astype(object)
+                except Exception:
+                    df = pd.read_csv(path, dtype=object, keep_default_na=False)
             else:
-                df = pd.read_excel(path, dtype=object)
+                df = pd.read_excel(path, dtype=object, engine=EXCEL_ENGINE)
             for col in COLUMNS:
                 if col not in df.columns:
                     df[col] = ""
             df = df[COLUMNS].fillna("")
+            self.model.set_dataframe(df)
             self.df = df
-            self.model = PandasModel(self.df)
-            self.table.setModel(self.model)
-            self.model.dataChangedSignal.connect(self.update_total)
+            self._sync_next_po()
             self.update_total()
         except Exception as e:
             QMessageBox.critical(self, "Import error", str(e))
@@ -227,22 +410,10 @@ class CompanyTab(QWidget):
         if not path:
             QMessageBox.warning(self, "No path", "Choose a CSV path first.")
             return
-        df = self.model._df.copy()
-
-        # normalize Amount
-        if "Amount" in df.columns:
-            df["Amount"] = df["Amount"].map(money_to_csv)
-
-        # strip CR/LF din text
-        for col in df.columns:
-            df[col] = df[col].map(lambda x: str(x).replace("\r", " ").replace("\n", " ").strip())
+        df = self.model._df
 
         # avertizare simplă IBAN
-        bad = []
-        for col in ("Payer Account IBAN", "Payee Account IBAN"):
-            for i, val in enumerate(df[col].tolist()):
-                if str(val).strip() and not IBAN_REGEX.match(str(val).strip()):
-                    bad.append((i + 1, col))
+        bad = [(int(i) + 1, col) for col in IBAN_COLS for i in np.where(self.model._iban_bad[col])[0][:5]]
         if bad:
             QMessageBox.warning(self, "Validation", f"Some IBANs look invalid (should start with RO). Sample rows: {bad[:5]}")
 
@@ -252,9 +423,20 @@ class CompanyTab(QWidget):
 
         try:
             tmp = path + ".tmp"
-            df.to_csv(tmp, index=False, header=header, encoding=encoding, lineterminator=line_ending)
-            if os.path.exists(path):
-                os.remove(path)
+            amount_idx = df.columns.get_loc("Amount") if "Amount" in df.columns else -1
+            # scriere rând cu rând, cu buffer mare; Amount normalizat și CR/LF eliminat pe loc
+            with open(tmp, "w", encoding=encoding, newline="", buffering=1 << 20) as f:
+                w = csv.writer(f, lineterminator=line_ending)
+                if header:
+                    w.writerow(df.columns)
+                # pe bucăți de EXPORT_CHUNK_ROWS rânduri, cu flush după fiecare
+                for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+                    for row in df.iloc[start:start + EXPORT_CHUNK_ROWS].itertuples(index=False, name=None):
+                        out = [text_to_csv(x) for x in row]
+                        if amount_idx >= 0:
+                            out[amount_idx] = text_to_csv(money_to_csv(row[amount_idx]))
+                        w.writerow(out)
+                    f.flush()
             os.replace(tmp, path)
         except Exception as e:
             QMessageBox.critical(self, "Export error", str(e))
@@ -264,13 +446,16 @@ class CompanyTab(QWidget):
 
     def update_total(self):
         try:
-            s = 0.0
-            for x in self.model._df["Amount"].tolist():
-                if str(x).strip():
-                    try:
-                        s += float(money_to_csv(x))
-                    except:
-                        pass
+            col = self.model._df["Amount"]
+            if numba is not None and len(col) > NUMBA_MIN_ROWS:
+                values, parsed = parse_amounts(amount_bytes(col))
+                s = float(values[parsed].sum())
+                if not parsed.all():
+                    rest = pd.to_numeric(money_series_to_csv(col[~parsed]), errors="coerce")
+                    s += float(rest.fillna(0).sum())
+            else:
+                amounts = pd.to_numeric(money_series_to_csv(col), errors="coerce")
+                s = float(amounts.fillna(0).sum())
             self.total_label.setText(f"Total: {s:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
         except Exception:
             self.total_label.setText("Total : 0.00")
@@ -331,6 +516,13 @@ class MainWindow(QMainWindow):
         data = []
         for i in range(self.tabs.count()):
             w: CompanyTab = self.tabs.widget(i)
+            # redenumire încă în așteptare (timer) -> o aplicăm acum
+            if w._rename_timer.isActive():
+                w._rename_timer.stop()
+                w._emit_title_change_now()
+            # datele fiecărei firme în fișier Feather separat, JSON-ul rămâne doar index
+            data_file = Path(f"{path}.{i}.feather")
+            w.model._df.fillna("").astype(str).to_feather(data_file)
             data.append({
                 "name": w.company_name,
                 "path": w.path_edit.text(),
@@ -339,33 +531,39 @@ class MainWindow(QMainWindow):
                     "crlf": w.crlf_chk.isChecked(),
                     "bom": w.bom_chk.isChecked()
                 },
-                "rows": w.model._df.fillna("").values.tolist()
+                "data_file": data_file.name
             })
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        Path(path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        # fișiere rămase de la o salvare anterioară cu mai multe firme
+        i = self.tabs.count()
+        while Path(f"{path}.{i}.feather").exists():
+            Path(f"{path}.{i}.feather").unlink()
+            i += 1
         self.statusBar().showMessage(f"Saved profile: {path}", 3000)
 
     def load_profile(self):
         path, _ = QFileDialog.getOpenFileName(self, "Incarca Profil", "", "Profil (*.json)")
         if not path:
             return
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        # construim toate tab-urile înainte de a le șterge pe cele existente
+        tabs = []
+        try:
+            data = orjson.loads(Path(path).read_bytes())
+            for comp in data:
+                if "data_file" in comp:
+                    rows = pd.read_feather(Path(path).parent / comp["data_file"])
+                else:
+                    # profil vechi: rândurile sunt direct în JSON
+                    rows = comp.get("rows", [])
+                tabs.append(CompanyTab.from_rows(comp.get("name", "Firma"), rows,
+                                                 comp.get("options", {}), comp.get("path", "")))
+        except Exception as e:
+            for tab in tabs:
+                tab.deleteLater()
+            QMessageBox.critical(self, "Load error", str(e))
+            return
         self.tabs.clear()
-        for comp in data:
-            tab = CompanyTab(comp.get("name", "Firma"))
-            tab.path_edit.setText(comp.get("path", ""))
-            opts = comp.get("options", {})
-            tab.no_header_chk.setChecked(opts.get("no_header", True))
-            tab.crlf_chk.setChecked(opts.get("crlf", True))
-            tab.bom_chk.setChecked(opts.get("bom", True))
-            rows = comp.get("rows", [])
-            df = pd.DataFrame(rows, columns=COLUMNS)
-            tab.df = df
-            tab.model = PandasModel(df)
-            tab.table.setModel(tab.model)
-            tab.model.dataChangedSignal.connect(tab.update_total)
-            tab.update_total()
+        for tab in tabs:
             self.tabs.addTab(tab, tab.company_name)
             tab.titleChanged.connect(self._rename_tab)
         if self.tabs.count() == 0: